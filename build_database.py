@@ -8,9 +8,52 @@ Author: Wal33D
 
 import sqlite3
 import os
+import re
+import sys
+from itertools import islice
 from pathlib import Path
-from collections import defaultdict
-from typing import Dict, Set, Any
+from typing import Iterator, Tuple
+
+# "CODE - DESCRIPTION" lines, matched over a whole file; horizontal whitespace
+# only, so a match never spans lines. The greedy description is right-stripped
+# by the caller, which is much cheaper than a lazy (.*?)\s*$. A blank
+# description is not a match
+_LINE_RE = re.compile(
+    r'^[^\S\n]*([PBCU][0-9A-Z]{4})[^\S\n]* - [^\S\n]*(\S.*)',
+    re.ASCII | re.IGNORECASE | re.MULTILINE,
+)
+
+# Source files holding the generic (SAE) definitions for each code system
+_GENERIC_FILES = frozenset({'p_codes', 'b_codes', 'c_codes', 'u_codes'})
+
+# Rows handed to each executemany call; bounds memory on large source files
+INSERT_CHUNK_SIZE = 10_000
+
+def gen_rows(file_path: Path, manufacturer: str,
+             is_generic: bool) -> Iterator[Tuple[str, str, str, bool, str]]:
+    """Yield dtc_definitions rows parsed from one source file"""
+    file_name = file_path.stem
+
+    # Read the raw bytes in one call and decode once, bypassing the text
+    # layer's incremental chunked decoding
+    text = file_path.read_bytes().decode('utf-8')
+    for code, description in _LINE_RE.findall(text):
+        # Code case and type are derived in the INSERT itself
+        yield (code, manufacturer, description.rstrip(), is_generic, file_name)
+
+def find_duplicates(file_path: Path, known_codes: Iterator[str]) -> Iterator[Tuple[str, int]]:
+    """Yield (code, line_num) for each code the load skipped as a duplicate"""
+    seen = set(known_codes)
+    text = file_path.read_bytes().decode('utf-8')
+    for line_num, line in enumerate(text.splitlines(), 1):
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        code = match.group(1).upper()
+        if code in seen:
+            yield code, line_num
+        else:
+            seen.add(code)
 
 def build_database():
     """Build database preserving manufacturer context"""
@@ -20,9 +63,18 @@ def build_database():
     if os.path.exists(db_path):
         os.remove(db_path)
 
-    conn = sqlite3.connect(db_path)
+    # Autocommit mode; the bulk load below runs in one explicit transaction
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
 
+    # Nothing else reads the file while it is being built, so skip the
+    # rollback journal and keep the file lock for the whole run
+    cursor.execute('PRAGMA journal_mode=OFF')
+    cursor.execute('PRAGMA locking_mode=EXCLUSIVE')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-65536')
+
     # Create improved schema
     cursor.execute('''
         CREATE TABLE dtc_definitions (
@@ -37,21 +89,6 @@ def build_database():
         )
     ''')
 
-    # Create indexes for performance
-    cursor.execute('CREATE INDEX idx_code ON dtc_definitions(code)')
-    cursor.execute('CREATE INDEX idx_manufacturer ON dtc_definitions(manufacturer)')
-    cursor.execute('CREATE INDEX idx_generic ON dtc_definitions(is_generic)')
-    cursor.execute('CREATE INDEX idx_locale ON dtc_definitions(locale)')
-    cursor.execute('CREATE INDEX idx_type ON dtc_definitions(type)')
-
-    # Create view for generic codes (English by default)
-    cursor.execute('''
-        CREATE VIEW generic_codes AS
-        SELECT DISTINCT code, description, type
-        FROM dtc_definitions
-        WHERE is_generic = 1 AND locale = 'en'
-    ''')
-
     # Create statistics table
     cursor.execute('''
         CREATE TABLE statistics (
@@ -67,14 +104,16 @@ def build_database():
 
     source_dir = Path('data/source-data')
     total_entries = 0
-    manufacturer_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {'total': 0, 'unique': set(), 'P': 0, 'B': 0, 'C': 0, 'U': 0})
+    warnings = []
+
+    cursor.execute('BEGIN')
 
     # Process each file
     for file_path in sorted(source_dir.glob('*.txt')):
         file_name = file_path.stem
 
         # Determine manufacturer
-        if file_name in ['p_codes', 'b_codes', 'c_codes', 'u_codes']:
+        if file_name in _GENERIC_FILES:
             manufacturer = 'GENERIC'
             is_generic = True
         else:
@@ -83,48 +122,102 @@ def build_database():
 
         print(f"Processing {manufacturer}...")
 
-        # Read and parse file
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if ' - ' in line:
-                    parts = line.split(' - ', 1)
-                    if len(parts) == 2:
-                        code = parts[0].strip().upper()
-                        desc = parts[1].strip()
-
-                        # Skip obvious data errors
-                        if len(code) == 5 and code[0] in 'PBCU':
-                            # Extract code type (P, B, C, or U)
-                            code_type = code[0]
-
-                            # Insert definition
-                            try:
-                                cursor.execute('''
-                                    INSERT INTO dtc_definitions
-                                    (code, manufacturer, description, type, locale, is_generic, source_file)
-                                    VALUES (?, ?, ?, ?, 'en', ?, ?)
-                                ''', (code, manufacturer, desc, code_type, is_generic, file_name))
-
-                                total_entries += 1
-
-                                # Update stats
-                                manufacturer_stats[manufacturer]['total'] += 1
-                                manufacturer_stats[manufacturer]['unique'].add(code)
-                                manufacturer_stats[manufacturer][code[0]] += 1
-
-                            except sqlite3.IntegrityError:
-                                # Duplicate within same manufacturer file
-                                print(f"  Warning: Duplicate {code} in {file_name} line {line_num}")
-
-    # Insert statistics
-    for mfr, stats in manufacturer_stats.items():
+        rows = gen_rows(file_path, manufacturer, is_generic)
+        parsed = 0
+        inserted = 0
+
+        # Insert in bounded chunks straight from the parser. The primary key
+        # keeps the first definition when a code repeats for a manufacturer.
+        while True:
+            chunk = list(islice(rows, INSERT_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            cursor.executemany('''
+                INSERT OR IGNORE INTO dtc_definitions
+                (code, manufacturer, description, type, locale, is_generic, source_file)
+                VALUES (upper(?1), ?2, ?3, upper(substr(?1, 1, 1)), 'en', ?4, ?5)
+            ''', chunk)
+            parsed += len(chunk)
+            inserted += cursor.rowcount
+
+        if parsed != inserted:
+            # Only files that lost rows are rescanned, seeded with the codes
+            # earlier files already stored for this manufacturer
+            cursor.execute(
+                'SELECT code FROM dtc_definitions WHERE manufacturer = ? AND source_file != ?',
+                (manufacturer, file_name),
+            )
+            known_codes = (code for (code,) in cursor.fetchall())
+            for code, line_num in find_duplicates(file_path, known_codes):
+                warnings.append(f"  Warning: Duplicate {code} in {file_name} line {line_num}")
+        total_entries += inserted
+
+    # Report data warnings in one write once the load loop is done
+    if warnings:
+        sys.stdout.flush()
+        sys.stderr.write('\n'.join(warnings) + '\n')
+
+    # Aggregate per-manufacturer statistics in SQLite
+    cursor.execute('''
+        INSERT INTO statistics
+        SELECT manufacturer, COUNT(*), COUNT(DISTINCT code),
+               SUM(type = 'P'), SUM(type = 'B'), SUM(type = 'C'), SUM(type = 'U')
+        FROM dtc_definitions
+        GROUP BY manufacturer
+    ''')
+
+    # Create indexes once the data is loaded so each one is built in a
+    # single pass instead of being updated on every insert
+    cursor.execute('CREATE INDEX idx_code ON dtc_definitions(code)')
+    cursor.execute('CREATE INDEX idx_manufacturer ON dtc_definitions(manufacturer)')
+    cursor.execute('CREATE INDEX idx_generic ON dtc_definitions(is_generic)')
+    cursor.execute('CREATE INDEX idx_locale ON dtc_definitions(locale)')
+    cursor.execute('CREATE INDEX idx_type ON dtc_definitions(type)')
+
+    # Point lookups by code: ordered like the library's generic-first
+    # ORDER BY so the first entry visited is the answer
+    cursor.execute('''
+        CREATE INDEX idx_code_lookup
+        ON dtc_definitions(code, locale, is_generic DESC, manufacturer)
+    ''')
+
+    # List queries: filter and ORDER BY both come straight off the index,
+    # so get_by_type/get_manufacturer_codes need no temp B-tree sort
+    cursor.execute('''
+        CREATE INDEX idx_type_lookup
+        ON dtc_definitions(type, locale, is_generic DESC, code)
+    ''')
+    cursor.execute('''
+        CREATE INDEX idx_manufacturer_lookup
+        ON dtc_definitions(manufacturer, locale, code)
+    ''')
+
+    # Create view for generic codes (English by default)
+    cursor.execute('''
+        CREATE VIEW generic_codes AS
+        SELECT DISTINCT code, description, type
+        FROM dtc_definitions
+        WHERE is_generic = 1 AND locale = 'en'
+    ''')
+
+    # Full-text index over code and description for keyword search
+    try:
         cursor.execute('''
-            INSERT INTO statistics VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (mfr, stats['total'], len(stats['unique']),
-              stats['P'], stats['B'], stats['C'], stats['U']))
+            CREATE VIRTUAL TABLE dtc_fts USING fts5(
+                code, description,
+                content='dtc_definitions', content_rowid='rowid',
+                tokenize='trigram', detail='none'
+            )
+        ''')
+        cursor.execute("INSERT INTO dtc_fts(dtc_fts) VALUES('rebuild')")
+    except sqlite3.OperationalError:
+        sys.stdout.flush()
+        sys.stderr.write("Warning: SQLite lacks FTS5 trigram support, skipping dtc_fts\n")
 
-    conn.commit()
+    # Give the query planner row-count statistics for the new indexes
+    cursor.execute('ANALYZE')
+    cursor.execute('COMMIT')
 
     # Print summary
     print(f"\n=== Perfect Database Built ===")
@@ -156,12 +249,13 @@ def build_database():
     for mfr, desc in cursor.fetchall():
         print(f"  {mfr:12} : {desc[:60]}...")
 
-    # Overall statistics
-    cursor.execute('SELECT COUNT(DISTINCT code) FROM dtc_definitions')
-    unique_codes = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(DISTINCT code) FROM dtc_definitions WHERE is_generic = 1')
-    generic_codes = cursor.fetchone()[0]
+    # Overall statistics in one pass
+    cursor.execute('''
+        SELECT COUNT(DISTINCT code),
+               COUNT(DISTINCT CASE WHEN is_generic = 1 THEN code END)
+        FROM dtc_definitions
+    ''')
+    unique_codes, generic_codes = cursor.fetchone()
 
     print(f"\n=== Statistics ===")
     print(f"Total entries: {total_entries}")
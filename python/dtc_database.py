@@ -8,16 +8,195 @@ Provides access to the local SQLite dataset in data/dtc_codes.db.
 from __future__ import annotations
 
 import os
+import re
 import sqlite3
-from collections import OrderedDict
+import sys
+import threading
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Matched across a whole source file; the description group is greedy and
+# right-stripped by the caller (see build_database.py); a blank description
+# is not a match
+_LINE_RE = re.compile(
+    r"^[^\S\n]*([PBCU][0-9A-Z]{4})[^\S\n]* - [^\S\n]*(\S.*)",
+    re.ASCII | re.IGNORECASE | re.MULTILINE,
+)
+
+# Source files holding the generic (SAE) definitions, as in build_database.py
+_GENERIC_FILES = frozenset({"p_codes", "b_codes", "c_codes", "u_codes"})
+
+# Codes bound per IN (...) query; a power of two under SQLite's 999-variable default
+_BATCH_CHUNK_SIZE = 512
+
+# Static statements live at module level so every call hands sqlite3 the
+# same string and hits its per-connection prepared-statement cache
+
+# Manufacturer's own definition first, GENERIC as fallback. Each arm is a
+# primary-key probe returning at most one row; SQLite does not promise the
+# order of UNION ALL arms, so the prio column ranks them explicitly
+_SQL_GET_FOR_MANUFACTURER = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM (
+        SELECT 0 AS prio, code, description, type, manufacturer, is_generic, locale
+        FROM dtc_definitions
+        WHERE code = ?1 AND manufacturer = ?2 AND locale = ?3
+        UNION ALL
+        SELECT 1 AS prio, code, description, type, manufacturer, is_generic, locale
+        FROM dtc_definitions
+        WHERE code = ?1 AND manufacturer = 'GENERIC' AND locale = ?3
+    )
+    ORDER BY prio
+    LIMIT 1
+"""
+
+_SQL_GET_ANY = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM dtc_definitions
+    WHERE code = ? AND locale = ?
+    ORDER BY is_generic DESC, manufacturer ASC
+    LIMIT 1
+"""
+
+_SQL_SNAPSHOT = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM dtc_definitions
+    WHERE locale = ?
+    ORDER BY code ASC, is_generic DESC, manufacturer ASC
+"""
+
+# The trigram index narrows the rows to candidates holding every trigram of a
+# keyword; {conditions} are the same LIKE terms as the substring scan, so both
+# match the same rows. The ORDER BY covers the whole (code, manufacturer)
+# key, so a LIMIT keeps the same rows on either path
+_SQL_SEARCH_FTS = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM dtc_definitions
+    WHERE rowid IN (SELECT rowid FROM dtc_fts WHERE dtc_fts MATCH ?)
+      AND ({conditions}) AND locale = ?
+    ORDER BY is_generic DESC, code ASC, manufacturer ASC
+    LIMIT ?
+"""
+
+_SQL_BY_TYPE = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM dtc_definitions
+    WHERE type = ? AND locale = ?
+    ORDER BY is_generic DESC, code ASC
+    LIMIT ?
+"""
+
+_SQL_BY_MANUFACTURER = """
+    SELECT code, description, type, manufacturer, is_generic, locale
+    FROM dtc_definitions
+    WHERE manufacturer = ? AND locale = ?
+    ORDER BY code ASC
+    LIMIT ?
+"""
+
+_SQL_STATISTICS = """
+    SELECT
+        COUNT(*),
+        COUNT(DISTINCT code),
+        COUNT(CASE WHEN is_generic = 1 THEN 1 END),
+        COUNT(DISTINCT CASE WHEN manufacturer != 'GENERIC' THEN manufacturer END),
+        COUNT(CASE WHEN type = 'P' THEN 1 END),
+        COUNT(CASE WHEN type = 'B' THEN 1 END),
+        COUNT(CASE WHEN type = 'C' THEN 1 END),
+        COUNT(CASE WHEN type = 'U' THEN 1 END)
+    FROM dtc_definitions
+    WHERE locale = ?
+"""
+
+@lru_cache(maxsize=None)
+def _batch_lookup_sql(arity: int) -> str:
+    """Build batch_lookup's statement for an IN list of ``arity`` codes."""
+    placeholders = ",".join("?" * arity)
+    # Same preference as get_dtc(): generic first, then by manufacturer
+    return f"""
+    SELECT code, description
+    FROM dtc_definitions
+    WHERE code IN ({placeholders}) AND locale = ?
+    ORDER BY code ASC, is_generic DESC, manufacturer ASC
+"""
 
 
-@dataclass
+# Same lookup indexes as build_database.py, ordered to match the queries above
+_SQL_CREATE_INDEXES = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_code_lookup
+    ON dtc_definitions(code, locale, is_generic DESC, manufacturer)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_type_lookup
+    ON dtc_definitions(type, locale, is_generic DESC, code)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_manufacturer_lookup
+    ON dtc_definitions(manufacturer, locale, code)
+    """,
+)
+
+# Same full-text index as build_database.py, plus triggers that keep the
+# external-content table in step with later writes to dtc_definitions
+_SQL_CREATE_FTS = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS dtc_fts USING fts5(
+        code, description,
+        content='dtc_definitions', content_rowid='rowid',
+        tokenize='trigram', detail='none'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dtc_fts_insert AFTER INSERT ON dtc_definitions BEGIN
+        INSERT INTO dtc_fts(rowid, code, description)
+        VALUES (new.rowid, new.code, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dtc_fts_delete AFTER DELETE ON dtc_definitions BEGIN
+        INSERT INTO dtc_fts(dtc_fts, rowid, code, description)
+        VALUES ('delete', old.rowid, old.code, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS dtc_fts_update AFTER UPDATE ON dtc_definitions BEGIN
+        INSERT INTO dtc_fts(dtc_fts, rowid, code, description)
+        VALUES ('delete', old.rowid, old.code, old.description);
+        INSERT INTO dtc_fts(rowid, code, description)
+        VALUES (new.rowid, new.code, new.description);
+    END
+    """,
+)
+
+# Dropped for the bulk load, where the 'rebuild' after it is one pass
+# instead of a trigger call per row; _SQL_CREATE_FTS restores them
+_SQL_DROP_FTS_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS dtc_fts_insert",
+    "DROP TRIGGER IF EXISTS dtc_fts_delete",
+    "DROP TRIGGER IF EXISTS dtc_fts_update",
+)
+
+
+_TYPE_NAMES = {
+    "P": "Powertrain",
+    "B": "Body",
+    "C": "Chassis",
+    "U": "Network",
+}
+
+# __slots__ drops the per-instance __dict__; dataclass only generates it on 3.10+
+_DTC_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_DTC_OPTIONS)
 class DTC:
-    """Diagnostic Trouble Code."""
+    """Diagnostic Trouble Code.
+
+    Immutable, since lookups hand out the same cached instance to every caller.
+    """
 
     code: str
     description: str
@@ -32,23 +211,38 @@ class DTC:
     @property
     def type_name(self) -> str:
         """Get human-readable type name."""
-        types = {
-            "P": "Powertrain",
-            "B": "Body",
-            "C": "Chassis",
-            "U": "Network",
-        }
-        return types.get(self.type, "Unknown")
+        return _TYPE_NAMES.get(self.type, "Unknown")
 
 
 class DTCDatabase:
-    """DTC Database interface for Python applications."""
+    """
+    DTC Database interface for Python applications.
+
+    Instances may be shared between threads; each thread queries through its
+    own connection, opened on its first lookup.
+
+    Args:
+        db_path: Path to the SQLite file. Defaults to data/dtc_codes.db.
+        locale: Active locale for lookups.
+        cache_size: Maximum number of cached get_dtc/get_description lookups.
+            Unused with preload, which already holds every definition.
+        in_memory: Copy the whole database into memory on open, so lookups
+            never touch the file system afterwards.
+        preload: Load every definition of the active locale into Python dicts
+            so get_dtc/get_description are served without SQL.
+        readonly: Open the file read-only and immutable, skipping all file
+            locking. Pass False when another process may modify the file
+            while this instance has it open.
+    """
 
     def __init__(
         self,
         db_path: Optional[str] = None,
         locale: str = "en",
         cache_size: int = 100,
+        in_memory: bool = False,
+        preload: bool = False,
+        readonly: bool = True,
     ):
         if db_path is None:
             db_path = os.path.join(os.path.dirname(__file__), "..", "data", "dtc_codes.db")
@@ -61,22 +255,190 @@ class DTCDatabase:
         self.db_path = db_path
         self.locale = locale
         self.cache_size = cache_size
-        self.cache: OrderedDict[str, str] = OrderedDict()
+        # Per-instance LRU of resolved DTCs keyed on (code, manufacturer, locale);
+        # get_description reads the description off the cached object
+        self._dtc_cache = lru_cache(maxsize=cache_size)(self._fetch_dtc)
+
+        self.in_memory = in_memory
+        self.readonly = readonly
+        # One connection and reused cursor per thread; every connection this
+        # instance opens is tracked by its thread so close() can release them
+        # all and connections of finished threads can be reclaimed
+        self._local = threading.local()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        # in_memory: private copy of the file, read once, that each thread's
+        # connection is copied from
+        self._image: Optional[sqlite3.Connection] = None
+        self._image_lock = threading.Lock()
+        self.conn = self._open_lookup_connection()
+        self._local.cursor = self.conn.cursor()
+        self._has_fts = self._detect_fts()
+
+        self.preload = preload
+        self._snapshot_locale: Optional[str] = None
+        self._snapshot_by_key: Dict[Tuple[str, str], DTC] = {}
+        self._snapshot_by_code: Dict[str, DTC] = {}
+        # With a snapshot every lookup is already a dict hit, so the LRU in
+        # front of it would only add bookkeeping
+        self._resolve = self._fetch_dtc if preload else self._dtc_cache
+        if preload:
+            self._load_snapshot()
+
+    def _open_lookup_connection(self) -> sqlite3.Connection:
+        """Open and register a lookup connection for the calling thread."""
+        if self.in_memory:
+            conn = self._open_in_memory()
+        elif self.readonly:
+            conn = self._open_readonly(self.db_path)
+        else:
+            # Plain locking connection; the file's journal mode is left alone
+            conn = sqlite3.connect(self.db_path, cached_statements=256, check_same_thread=False)
+        self._configure_connection(conn)
+        if self.readonly:
+            conn.execute("PRAGMA query_only=1")
+        with self._connections_lock:
+            finished = [thread for thread in self._connections if not thread.is_alive()]
+            for thread in finished:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _get_cursor(self) -> sqlite3.Cursor:
+        """Return the calling thread's cursor, opening its connection on first use."""
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._open_lookup_connection().cursor()
+        return cursor
+
+    def _open_readonly(self, db_path: str) -> sqlite3.Connection:
+        """Open the file read-only and immutable for lookups."""
+        # Lookups never write, so SQLite can skip file locking and
+        # journal/WAL checks entirely. Each connection stays on one thread;
+        # check_same_thread is off only so close() may run from any thread.
+        return sqlite3.connect(
+            f"{Path(db_path).resolve().as_uri()}?mode=ro&immutable=1",
+            uri=True,
+            cached_statements=256,
+            check_same_thread=False,
+        )
 
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+    def _open_readwrite(self, db_path: str) -> sqlite3.Connection:
+        """Open a writable connection tuned for bulk loads."""
+        conn = sqlite3.connect(db_path, cached_statements=256, check_same_thread=False)
+        # WAL needs a real file next to the database; :memory: has none
+        if db_path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Fire the dtc_fts delete trigger for rows removed by INSERT OR REPLACE
+        conn.execute("PRAGMA recursive_triggers=ON")
+        return conn
+
+    def _open_in_memory(self) -> sqlite3.Connection:
+        """Give the calling thread its own in-memory copy of the database."""
+        conn = sqlite3.connect(":memory:", cached_statements=256, check_same_thread=False)
+        # Its own lock, so a slow or failing load never blocks threads that
+        # only register or reclaim connections
+        with self._image_lock:
+            if self._image is None:
+                self._image = self._load_image()
+            # Later threads copy the image, never the file, so they see the
+            # same data even if the file changes or is removed
+            self._image.backup(conn)
+        return conn
+
+    def _load_image(self) -> sqlite3.Connection:
+        """Read the database file once into a private in-memory image."""
+        # Copy through SQLite rather than raw file bytes: a WAL-mode file's
+        # header cannot be deserialized, and a plain (not immutable) read-only
+        # connection also picks up pages still in the -wal file
+        source = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            timeout=5.0,
+            isolation_level=None,
+        )
+        try:
+            # backup() retries a locked source without limit; taking the read
+            # lock first turns a busy file into an error after the timeout
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+            image = sqlite3.connect(":memory:", check_same_thread=False)
+            source.backup(image)
+        finally:
+            source.close()
+        return image
+
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        """Apply read-oriented tuning PRAGMAs to a connection."""
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")  # 64 MiB page cache
+        conn.execute("PRAGMA mmap_size=268435456")
+
+    def _detect_fts(self) -> bool:
+        """Check whether the dtc_fts full-text index exists and is usable."""
+        try:
+            self.conn.execute("SELECT 1 FROM dtc_fts LIMIT 0")
+        except sqlite3.OperationalError:
+            return False
+        # Files built before the trigram tokenizer hold a word index that
+        # cannot answer the trigram queries search() sends
+        row = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'dtc_fts'").fetchone()
+        return "trigram" in row[0]
+
+    def _load_snapshot(self) -> None:
+        """Build the preload dicts for the active locale in one query."""
+        by_key: Dict[Tuple[str, str], DTC] = {}
+        by_code: Dict[str, DTC] = {}
+        cursor = self._get_cursor()
+        # A new file waiting for create_database() has no table yet; the
+        # snapshot is loaded once the build has created it
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dtc_definitions'"
+        )
+        if cursor.fetchone() is None:
+            return
+        cursor.execute(_SQL_SNAPSHOT, (self.locale,))
+        for row in cursor:
+            dtc = self._row_to_dtc(row)
+            by_key[(row[0], row[3])] = dtc
+            # First row per code follows get_dtc's generic-first preference
+            by_code.setdefault(row[0], dtc)
+
+        self._snapshot_by_key = by_key
+        self._snapshot_by_code = by_code
+        self._snapshot_locale = self.locale
 
     def set_locale(self, locale: str) -> None:
         """Set active locale for lookups and clear cache."""
         if locale and locale != self.locale:
             self.locale = locale
-            self.cache.clear()
+            self._dtc_cache.cache_clear()
+            if self.preload:
+                self._load_snapshot()
+
+    def cache_info(self) -> Tuple[int, int, Optional[int], int]:
+        """
+        Get (hits, misses, maxsize, currsize) of the lookup cache.
+
+        Useful for sizing cache_size. Preloaded instances bypass the cache,
+        so their counters stay at zero.
+        """
+        return self._dtc_cache.cache_info()
 
     def create_database(self):
-        """Create database from source files using the current schema."""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row
-        cursor = self.conn.cursor()
+        """
+        Create database from source files using the current schema.
+
+        Reopens the connection read-write. Lookup connections held by other
+        threads are closed and reopened on their next call; other instances
+        holding the same file open must be recreated afterwards.
+        """
+        self._close_connections()
+        self._local = threading.local()
+        self.conn = self._open_readwrite(self.db_path)
+        self._configure_connection(self.conn)
+        cursor = self._local.cursor = self.conn.cursor()
 
         cursor.execute(
             """
@@ -93,8 +455,32 @@ class DTCDatabase:
             """
         )
 
+        for statement in _SQL_DROP_FTS_TRIGGERS:
+            cursor.execute(statement)
         self._load_from_source_files()
+
+        # Built after the load so each index is written in a single pass
+        for statement in _SQL_CREATE_INDEXES:
+            cursor.execute(statement)
+        try:
+            # Recreated rather than kept, in case an older build used another tokenizer
+            cursor.execute("DROP TABLE IF EXISTS dtc_fts")
+            for statement in _SQL_CREATE_FTS:
+                cursor.execute(statement)
+            # External content: index every row loaded above in one pass
+            cursor.execute("INSERT INTO dtc_fts(dtc_fts) VALUES('rebuild')")
+        except sqlite3.OperationalError:
+            pass  # No FTS5 trigram support; search() falls back to LIKE
+        cursor.execute("ANALYZE")
         self.conn.commit()
+        # WAL is only for the load; leave a single self-contained file that
+        # immutable readers and plain file copies see in full. fetchall()
+        # finishes the statement so it does not keep holding the file lock
+        self.conn.execute("PRAGMA journal_mode=DELETE").fetchall()
+        self._dtc_cache.cache_clear()
+        self._has_fts = self._detect_fts()
+        if self.preload:
+            self._load_snapshot()
 
     def _load_from_source_files(self):
         """Load codes from text files in data/source-data."""
@@ -103,38 +489,39 @@ class DTCDatabase:
             raise RuntimeError("Database connection not established")
 
         cursor = self.conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            # One executemany over every file; sqlite3 pulls rows from the
+            # generator in C, so no per-file row list is built
+            cursor.executemany(
+                """
+                INSERT OR REPLACE INTO dtc_definitions
+                (code, manufacturer, description, type, locale, is_generic, source_file)
+                VALUES (?, ?, ?, ?, 'en', ?, ?)
+                """,
+                self._iter_source_rows(source_dir),
+            )
+        except BaseException:
+            self.conn.rollback()
+            raise
+        self.conn.commit()
 
+    def _iter_source_rows(self, source_dir: Path) -> Iterator[Tuple[str, str, str, str, int, str]]:
+        """Yield dtc_definitions rows parsed from every source file."""
         for file_path in source_dir.glob("*.txt"):
             file_name = file_path.stem
 
-            if file_name in {"p_codes", "b_codes", "c_codes", "u_codes"}:
+            if file_name in _GENERIC_FILES:
                 manufacturer = "GENERIC"
                 is_generic = 1
             else:
                 manufacturer = file_name.replace("_codes", "").upper()
                 is_generic = 0
 
-            with open(file_path, "r", encoding="utf-8") as handle:
-                for line in handle:
-                    line = line.strip()
-                    if " - " not in line:
-                        continue
-
-                    code, desc = line.split(" - ", 1)
-                    code = code.strip().upper()
-                    desc = desc.strip()
-
-                    if len(code) != 5 or code[0] not in "PBCU":
-                        continue
-
-                    cursor.execute(
-                        """
-                        INSERT OR REPLACE INTO dtc_definitions
-                        (code, manufacturer, description, type, locale, is_generic, source_file)
-                        VALUES (?, ?, ?, ?, 'en', ?, ?)
-                        """,
-                        (code, manufacturer, desc, code[0], is_generic, file_name),
-                    )
+            text = file_path.read_bytes().decode("utf-8")
+            for code, description in _LINE_RE.findall(text):
+                code = code.upper()
+                yield (code, manufacturer, description.rstrip(), code[0], is_generic, file_name)
 
     def _normalize_code(self, code: str) -> str:
         return code.upper().strip()
@@ -145,33 +532,12 @@ class DTCDatabase:
         cleaned = manufacturer.strip().upper()
         return cleaned or None
 
-    def _cache_get(self, key: str) -> Optional[str]:
-        if key not in self.cache:
-            return None
-        value = self.cache.pop(key)
-        self.cache[key] = value
-        return value
-
-    def _cache_set(self, key: str, value: str) -> None:
-        if key in self.cache:
-            self.cache.pop(key)
-        self.cache[key] = value
-        if len(self.cache) > self.cache_size:
-            self.cache.popitem(last=False)
-
-    def _row_to_dtc(self, row: sqlite3.Row) -> DTC:
-        manufacturer = row["manufacturer"]
-        is_generic = bool(row["is_generic"]) or manufacturer == "GENERIC"
-        normalized_manufacturer: Optional[str] = None if manufacturer == "GENERIC" else manufacturer
-
-        return DTC(
-            code=row["code"],
-            description=row["description"],
-            type=row["type"],
-            manufacturer=normalized_manufacturer,
-            is_generic=is_generic,
-            locale=row["locale"],
-        )
+    def _row_to_dtc(self, row: Tuple) -> DTC:
+        # Plain tuples in SELECT column order; cheaper than sqlite3.Row lookups
+        code, description, code_type, manufacturer, is_generic, locale = row
+        if manufacturer == "GENERIC":
+            return DTC(code, description, code_type, None, True, locale)
+        return DTC(code, description, code_type, manufacturer, bool(is_generic), locale)
 
     def get_description(self, code: str, manufacturer: Optional[str] = None) -> Optional[str]:
         """
@@ -184,20 +550,15 @@ class DTCDatabase:
         Returns:
             Description string or None if not found.
         """
-        normalized_code = self._normalize_code(code)
-        normalized_manufacturer = self._normalize_manufacturer(manufacturer)
-        cache_key = f"{normalized_code}:{normalized_manufacturer or 'GENERIC'}:{self.locale}"
-
-        cached = self._cache_get(cache_key)
-        if cached is not None:
-            return cached
-
-        dtc = self.get_dtc(normalized_code, normalized_manufacturer)
-        if not dtc:
+        if not self.conn:
             return None
 
-        self._cache_set(cache_key, dtc.description)
-        return dtc.description
+        dtc = self._resolve(
+            self._normalize_code(code),
+            self._normalize_manufacturer(manufacturer),
+            self.locale,
+        )
+        return dtc.description if dtc else None
 
     def get_dtc(self, code: str, manufacturer: Optional[str] = None) -> Optional[DTC]:
         """
@@ -214,46 +575,31 @@ class DTCDatabase:
         if not self.conn:
             return None
 
-        normalized_code = self._normalize_code(code)
-        normalized_manufacturer = self._normalize_manufacturer(manufacturer)
-        cursor = self.conn.cursor()
+        return self._resolve(
+            self._normalize_code(code),
+            self._normalize_manufacturer(manufacturer),
+            self.locale,
+        )
 
-        if normalized_manufacturer:
-            cursor.execute(
-                """
-                SELECT code, description, type, manufacturer, is_generic, locale
-                FROM dtc_definitions
-                WHERE code = ? AND manufacturer = ? AND locale = ?
-                LIMIT 1
-                """,
-                (normalized_code, normalized_manufacturer, self.locale),
-            )
-            row = cursor.fetchone()
-            if row:
-                return self._row_to_dtc(row)
+    def _fetch_dtc(
+        self, normalized_code: str, normalized_manufacturer: Optional[str], locale: str
+    ) -> Optional[DTC]:
+        if locale == self._snapshot_locale:
+            if normalized_manufacturer:
+                dtc = self._snapshot_by_key.get((normalized_code, normalized_manufacturer))
+                return dtc or self._snapshot_by_key.get((normalized_code, "GENERIC"))
+            return self._snapshot_by_code.get(normalized_code)
+
+        cursor = self._get_cursor()
 
+        if normalized_manufacturer:
             cursor.execute(
-                """
-                SELECT code, description, type, manufacturer, is_generic, locale
-                FROM dtc_definitions
-                WHERE code = ? AND manufacturer = 'GENERIC' AND locale = ?
-                LIMIT 1
-                """,
-                (normalized_code, self.locale),
+                _SQL_GET_FOR_MANUFACTURER, (normalized_code, normalized_manufacturer, locale)
             )
             row = cursor.fetchone()
             return self._row_to_dtc(row) if row else None
 
-        cursor.execute(
-            """
-            SELECT code, description, type, manufacturer, is_generic, locale
-            FROM dtc_definitions
-            WHERE code = ? AND locale = ?
-            ORDER BY is_generic DESC
-            LIMIT 1
-            """,
-            (normalized_code, self.locale),
-        )
+        cursor.execute(_SQL_GET_ANY, (normalized_code, locale))
         row = cursor.fetchone()
         return self._row_to_dtc(row) if row else None
 
@@ -267,18 +613,41 @@ class DTCDatabase:
         Returns:
             Dictionary mapping uppercase codes to descriptions.
         """
-        results: Dict[str, str] = {}
-        for code in codes:
-            normalized_code = self._normalize_code(code)
-            desc = self.get_description(normalized_code)
-            if desc:
-                results[normalized_code] = desc
-        return results
+        if not self.conn:
+            return {}
+
+        normalized_codes = list(dict.fromkeys(self._normalize_code(code) for code in codes))
+        if self.locale == self._snapshot_locale:
+            snapshot = self._snapshot_by_code
+            return {
+                code: dtc.description
+                for code in normalized_codes
+                if (dtc := snapshot.get(code)) and dtc.description
+            }
+
+        cursor = self._get_cursor()
+        found: Dict[str, str] = {}
+        for start in range(0, len(normalized_codes), _BATCH_CHUNK_SIZE):
+            chunk = normalized_codes[start : start + _BATCH_CHUNK_SIZE]
+            # Pad the IN list to a power of two so at most ten statement texts
+            # exist and all stay prepared; a repeated code in IN is a no-op
+            arity = 1 << (len(chunk) - 1).bit_length()
+            chunk += [chunk[-1]] * (arity - len(chunk))
+            cursor.execute(_batch_lookup_sql(arity), (*chunk, self.locale))
+            for code, description in cursor:
+                found.setdefault(code, description)
+
+        return {code: found[code] for code in normalized_codes if found.get(code)}
 
     def search(self, keyword: str, limit: int = 50) -> List[DTC]:
         """
         Search codes by keyword in code or description.
 
+        Matches the keyword as a case-insensitive substring. Uses the dtc_fts
+        trigram index when the database has one and the keyword is at least
+        three characters long, otherwise a plain scan; both give the same rows
+        in the same order.
+
         Args:
             keyword: Search term.
             limit: Maximum results.
@@ -286,23 +655,64 @@ class DTCDatabase:
         Returns:
             List of matching DTCs.
         """
-        if not self.conn or not keyword:
+        if not keyword:
             return []
+        return self.search_many([keyword], limit)
+
+    def search_many(self, keywords: List[str], limit: int = 50) -> List[DTC]:
+        """
+        Search codes matching any of several keywords in a single query.
+
+        Args:
+            keywords: Search terms; a row matches if it matches any of them.
+            limit: Maximum results.
+
+        Returns:
+            List of matching DTCs, ordered like search().
+        """
+        keywords = [keyword for keyword in keywords if keyword]
+        if not self.conn or not keywords:
+            return []
+
+        cursor = self._get_cursor()
+        conditions = " OR ".join(["code LIKE ? OR description LIKE ?"] * len(keywords))
+        params: List[object] = []
+        for keyword in keywords:
+            search_term = f"%{keyword}%"
+            params.extend((search_term, search_term))
+
+        # A keyword the trigram index cannot serve sends the whole OR to the
+        # scan, which reads every row anyway. Both paths match each keyword as
+        # a substring, so no keyword loses rows to another keyword's route
+        match_queries = [self._fts_query(keyword) for keyword in keywords] if self._has_fts else []
+        if match_queries and all(match_queries):
+            cursor.execute(
+                _SQL_SEARCH_FTS.format(conditions=conditions),
+                (" OR ".join(f"({query})" for query in match_queries), *params, self.locale, limit),
+            )
+            return [self._row_to_dtc(row) for row in cursor]
 
-        cursor = self.conn.cursor()
-        search_term = f"%{keyword}%"
         cursor.execute(
-            """
+            f"""
             SELECT code, description, type, manufacturer, is_generic, locale
             FROM dtc_definitions
-            WHERE (code LIKE ? OR description LIKE ?) AND locale = ?
-            ORDER BY is_generic DESC, code ASC
+            WHERE ({conditions}) AND locale = ?
+            ORDER BY is_generic DESC, code ASC, manufacturer ASC
             LIMIT ?
             """,
-            (search_term, search_term, self.locale, limit),
+            (*params, self.locale, limit),
         )
 
-        return [self._row_to_dtc(row) for row in cursor.fetchall()]
+        return [self._row_to_dtc(row) for row in cursor]
+
+    def _fts_query(self, keyword: str) -> Optional[str]:
+        """Build an FTS5 MATCH expression requiring every trigram of the keyword."""
+        # Trigrams need three characters, and % and _ are LIKE wildcards
+        # that the index does not know about
+        if len(keyword) < 3 or "%" in keyword or "_" in keyword:
+            return None
+        trigrams = sorted({keyword[start : start + 3] for start in range(len(keyword) - 2)})
+        return " ".join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
 
     def get_by_type(self, code_type: str, limit: int = 100) -> List[DTC]:
         """
@@ -318,18 +728,9 @@ class DTCDatabase:
         if not self.conn:
             return []
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT code, description, type, manufacturer, is_generic, locale
-            FROM dtc_definitions
-            WHERE type = ? AND locale = ?
-            ORDER BY is_generic DESC, code ASC
-            LIMIT ?
-            """,
-            (code_type.upper(), self.locale, limit),
-        )
-        return [self._row_to_dtc(row) for row in cursor.fetchall()]
+        cursor = self._get_cursor()
+        cursor.execute(_SQL_BY_TYPE, (code_type.upper(), self.locale, limit))
+        return [self._row_to_dtc(row) for row in cursor]
 
     def get_manufacturer_codes(self, manufacturer: str, limit: int = 200) -> List[DTC]:
         """
@@ -349,18 +750,9 @@ class DTCDatabase:
         if not normalized_manufacturer:
             return []
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """
-            SELECT code, description, type, manufacturer, is_generic, locale
-            FROM dtc_definitions
-            WHERE manufacturer = ? AND locale = ?
-            ORDER BY code ASC
-            LIMIT ?
-            """,
-            (normalized_manufacturer, self.locale, limit),
-        )
-        return [self._row_to_dtc(row) for row in cursor.fetchall()]
+        cursor = self._get_cursor()
+        cursor.execute(_SQL_BY_MANUFACTURER, (normalized_manufacturer, self.locale, limit))
+        return [self._row_to_dtc(row) for row in cursor]
 
     def get_statistics(self) -> Dict[str, int]:
         """
@@ -372,60 +764,45 @@ class DTCDatabase:
         if not self.conn:
             return {}
 
-        cursor = self.conn.cursor()
-        stats: Dict[str, int] = {}
-
-        cursor.execute(
-            "SELECT COUNT(*) FROM dtc_definitions WHERE locale = ?",
-            (self.locale,),
-        )
-        stats["total"] = int(cursor.fetchone()[0])
-
-        cursor.execute(
-            "SELECT COUNT(DISTINCT code) FROM dtc_definitions WHERE locale = ?",
-            (self.locale,),
-        )
-        stats["unique_codes"] = int(cursor.fetchone()[0])
-
-        cursor.execute(
-            "SELECT COUNT(*) FROM dtc_definitions WHERE is_generic = 1 AND locale = ?",
-            (self.locale,),
-        )
-        generic = int(cursor.fetchone()[0])
-        stats["generic"] = generic
-        stats["generic_codes"] = generic
-
-        manufacturer_specific = stats["total"] - generic
-        stats["manufacturer_specific"] = manufacturer_specific
-        stats["manufacturer_codes"] = manufacturer_specific
-
-        cursor.execute(
-            """
-            SELECT COUNT(DISTINCT manufacturer)
-            FROM dtc_definitions
-            WHERE manufacturer != 'GENERIC' AND locale = ?
-            """,
-            (self.locale,),
+        # One pass over the locale's rows instead of a query per counter
+        cursor = self._get_cursor()
+        cursor.execute(_SQL_STATISTICS, (self.locale,))
+        total, unique_codes, generic, manufacturers, type_p, type_b, type_c, type_u = (
+            cursor.fetchone()
         )
-        stats["manufacturers"] = int(cursor.fetchone()[0])
-
-        for code_type in ["P", "B", "C", "U"]:
-            cursor.execute(
-                """
-                SELECT COUNT(*)
-                FROM dtc_definitions
-                WHERE type = ? AND locale = ?
-                """,
-                (code_type, self.locale),
-            )
-            stats[f"type_{code_type}"] = int(cursor.fetchone()[0])
-
+        manufacturer_specific = total - generic
+
+        stats: Dict[str, int] = {
+            "total": total,
+            "unique_codes": unique_codes,
+            "generic": generic,
+            "generic_codes": generic,
+            "manufacturer_specific": manufacturer_specific,
+            "manufacturer_codes": manufacturer_specific,
+            "manufacturers": manufacturers,
+            "type_P": type_p,
+            "type_B": type_b,
+            "type_C": type_c,
+            "type_U": type_u,
+        }
         return stats
 
     def close(self):
         """Close database connection."""
         if self.conn:
             self.conn.close()
+        self._close_connections()
+
+    def _close_connections(self) -> None:
+        """Close every per-thread lookup connection and the in-memory image."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        with self._image_lock:
+            image, self._image = self._image, None
+        for conn in connections.values():
+            conn.close()
+        if image is not None:
+            image.close()
 
     def __enter__(self):
         """Context manager entry."""
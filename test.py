@@ -3,12 +3,17 @@
 Basic runtime tests for the Python DTC database wrapper.
 """
 
+import dataclasses
 import os
+import shutil
+import sqlite3
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from python.dtc_database import DTCDatabase
+from python.dtc_database import _LINE_RE, DTCDatabase
 
 
 def test_dtc_database():
@@ -23,6 +28,7 @@ def test_dtc_database():
         assert dtc is not None, f"{code} should exist"
         assert dtc.code == code, f"Expected normalized code {code}, got {dtc.code}"
         assert dtc.type == code[0], f"Expected type {code[0]}, got {dtc.type}"
+        assert dtc.type_name != "Unknown", f"{code} should have a known type name"
         assert dtc.description, f"{code} should have description"
 
     # Manufacturer fallback behavior.
@@ -31,16 +37,51 @@ def test_dtc_database():
     generic_fallback = db.get_description("P0171", "FORD")
     assert generic_fallback is not None, "Generic fallback should exist for P0171"
 
+    # Repeat lookups are served from the per-instance cache.
+    assert db.get_dtc(" p0171 ") is db.get_dtc("P0171"), "Repeat get_dtc should hit the cache"
+    assert db.cache_info().hits > 0, "Cache hits should be reported"
+    try:
+        db.get_dtc("P0171").description = "changed"
+        raise AssertionError("Cached DTCs should be immutable")
+    except dataclasses.FrozenInstanceError:
+        pass
+
+    # Batch lookup should normalize, de-duplicate and match single lookups.
+    batch = db.batch_lookup(["p0171", "P0300", "P0171", "NOTACODE"])
+    assert list(batch) == ["P0171", "P0300"], f"Unexpected batch keys {list(batch)}"
+    assert batch["P0171"] == db.get_description("P0171"), "Batch lookup should match get_description"
+
     # Search should return meaningful rows.
     results = db.search("oxygen", limit=10)
     assert results, "Search for oxygen should return results"
     assert all(item.description for item in results), "Search results should have descriptions"
+    code_results = db.search("P017", limit=20)
+    assert "P0171" in [item.code for item in code_results], "Code prefix search should find P0171"
+    assert db.search("xygen", limit=5), "Substring search should still match inside words"
+    ac_results = db.search("A/C", limit=1000)
+    assert ac_results, "Search for A/C should return results"
+    assert all("A/C" in item.description.upper() for item in ac_results), "A/C should match as a literal substring"
+    o2s_descriptions = [item.description.upper() for item in db.search("O2S", limit=1000)]
+    assert any("HO2S" in description for description in o2s_descriptions), "O2S should match inside HO2S"
+    many = db.search_many(["misfire", "knock"], limit=500)
+    many_codes = {item.code for item in many}
+    assert "P0300" in many_codes and "P0325" in many_codes, "Multi-keyword search should match any keyword"
+    for keywords in (["misfire", "xygen"], ["misfire", "O2"]):
+        expected = {(item.code, item.manufacturer) for keyword in keywords for item in db.search(keyword, limit=5000)}
+        found = {(item.code, item.manufacturer) for item in db.search_many(keywords, limit=5000)}
+        assert found == expected, f"search_many({keywords}) should be the union of each keyword's rows"
 
     # Manufacturer query should return rows for uppercase manufacturer input.
     ford_codes = db.get_manufacturer_codes("FORD", limit=20)
     assert ford_codes, "FORD manufacturer query should return rows"
     assert all(item.manufacturer == "FORD" for item in ford_codes), "Expected FORD rows only"
 
+    # Queries from worker threads run on their own connections.
+    expected_by_type = {code_type: db.get_by_type(code_type, limit=5) for code_type in "PBCU"}
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        threaded = list(pool.map(lambda code_type: db.get_by_type(code_type, limit=5), "PBCU" * 4))
+    assert threaded == [expected_by_type[code_type] for code_type in "PBCU" * 4], "Threaded queries mismatch"
+
     # Statistics should match known schema expectations.
     stats = db.get_statistics()
     assert stats["total"] > 0, "Total row count should be > 0"
@@ -52,6 +93,128 @@ def test_dtc_database():
     assert stats["type_U"] > 0, "U-code count should be > 0"
 
     db.close()
+
+    # In-memory copy should answer the same lookups as the file-backed one.
+    with DTCDatabase(db_path="data/dtc_codes.db", in_memory=True) as memory_db:
+        assert memory_db.get_description("P1690", "FORD") == ford_specific, "In-memory lookup mismatch"
+        assert memory_db.get_statistics() == stats, "In-memory statistics mismatch"
+
+    # Worker threads copy the in-memory image, so they work once the file is gone.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        memory_path = shutil.copy("data/dtc_codes.db", tmp_dir)
+        with DTCDatabase(db_path=memory_path, in_memory=True) as memory_db:
+            os.remove(memory_path)
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                threaded = list(pool.map(lambda code_type: memory_db.get_by_type(code_type, limit=5), "PB"))
+            assert threaded == [expected_by_type["P"], expected_by_type["B"]], "In-memory worker threads mismatch"
+
+    # A locked file fails the in-memory load with an error instead of hanging.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        locked_path = shutil.copy("data/dtc_codes.db", tmp_dir)
+        locker = sqlite3.connect(locked_path, isolation_level=None)
+        try:
+            locker.execute("BEGIN EXCLUSIVE")
+            try:
+                DTCDatabase(db_path=locked_path, in_memory=True)
+            except sqlite3.OperationalError:
+                pass
+            else:
+                raise AssertionError("Loading a locked file into memory should raise")
+        finally:
+            locker.close()
+
+    # A WAL-mode file loads into memory too, including rows not yet checkpointed.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wal_path = shutil.copy("data/dtc_codes.db", tmp_dir)
+        writer = sqlite3.connect(wal_path)
+        try:
+            writer.execute("PRAGMA journal_mode=WAL")
+            writer.execute("PRAGMA wal_autocheckpoint=0")
+            writer.execute("UPDATE dtc_definitions SET description = 'WAL row' WHERE code = 'P0300'")
+            writer.commit()
+            with DTCDatabase(db_path=wal_path, in_memory=True) as wal_db:
+                assert wal_db.get_description("P1690", "FORD") == ford_specific, "WAL in-memory lookup mismatch"
+                assert wal_db.get_description("P0300") == "WAL row", "WAL in-memory copy missed the -wal pages"
+        finally:
+            writer.close()
+
+    # A writable connection (for files other processes may change) reads the same data.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_copy = shutil.copy("data/dtc_codes.db", tmp_dir)
+        with DTCDatabase(db_path=db_copy, readonly=False) as writable_db:
+            assert writable_db.get_description("P1690", "FORD") == ford_specific, "Writable lookup mismatch"
+        assert not os.path.exists(db_copy + "-wal"), "Writable lookups should not switch the file to WAL"
+        with open(db_copy, "rb") as db_file:
+            assert db_file.read(20)[18:20] == b"\x01\x01", "Writable lookups should keep the rollback journal"
+
+    # Source lines with a blank description are not definitions.
+    parsed = _LINE_RE.findall("P0171 - \nP0172 -   \nP0173 - System Too Rich\n")
+    assert parsed == [("P0173", "System Too Rich")], "Blank descriptions should not parse"
+
+    # Indexed search and the substring scan agree even where the limit cuts into ties.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        scan_path = shutil.copy("data/dtc_codes.db", tmp_dir)
+        scan_conn = sqlite3.connect(scan_path)
+        scan_conn.execute("DROP TABLE dtc_fts")
+        scan_conn.commit()
+        scan_conn.close()
+        with DTCDatabase(db_path="data/dtc_codes.db") as fts_db, DTCDatabase(db_path=scan_path) as scan_db:
+            for keyword, limit in (("misfire", 50), ("HO2S", 50), ("o2s", 300), ("Malfunction", 300)):
+                assert fts_db.search(keyword, limit) == scan_db.search(keyword, limit), f"search({keyword!r}) differs"
+
+    # A word-tokenized dtc_fts from an older build is ignored rather than misused.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_path = shutil.copy("data/dtc_codes.db", tmp_dir)
+        old_db = sqlite3.connect(old_path)
+        old_db.execute("DROP TABLE dtc_fts")
+        old_db.execute(
+            "CREATE VIRTUAL TABLE dtc_fts USING fts5(code, description, content='dtc_definitions', "
+            "content_rowid='rowid', tokenize='porter unicode61')"
+        )
+        old_db.execute("INSERT INTO dtc_fts(dtc_fts) VALUES('rebuild')")
+        old_db.commit()
+        old_db.close()
+        with DTCDatabase(db_path=old_path) as old_fts_db:
+            assert old_fts_db.search("oxygen", limit=10) == results, "Older FTS index should fall back to LIKE"
+
+    # Rebuilding from source files should produce a searchable full-text index.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        built_path = os.path.join(tmp_dir, "built.db")
+        open(built_path, "wb").close()
+        with DTCDatabase(db_path=built_path, readonly=False) as built_db:
+            built_db.create_database()
+            assert not os.path.exists(built_path + "-wal"), "create_database should not leave the file in WAL mode"
+            # Nothing may still hold the file locked once the build returns.
+            other = sqlite3.connect(built_path, timeout=1)
+            try:
+                row_count = other.execute("SELECT COUNT(*) FROM dtc_definitions").fetchone()[0]
+                assert row_count > 0, "Second connection after create_database failed"
+            finally:
+                other.close()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                worker_rows = pool.submit(built_db.get_by_type, "P", 5).result(timeout=30)
+            assert worker_rows, "Worker thread lookup after create_database failed"
+            assert built_db.get_description("P1690", "FORD") == ford_specific, "Rebuilt lookup mismatch"
+            misfire_results = built_db.search("misfire", limit=500)
+            assert "P0300" in [item.code for item in misfire_results], "Rebuilt FTS search failed"
+            built_db.create_database()
+            assert built_db.search("misfire", limit=500) == misfire_results, "Second rebuild changed FTS search"
+
+    # Preloaded dict snapshot should resolve the same way as SQL lookups.
+    with DTCDatabase(db_path="data/dtc_codes.db", preload=True) as preload_db:
+        assert preload_db.get_description("P1690", "FORD") == ford_specific, "Preload manufacturer lookup mismatch"
+        assert preload_db.get_description("P0171", "FORD") == generic_fallback, "Preload fallback mismatch"
+        assert preload_db.get_dtc("NOTACODE") is None, "Preload should miss unknown codes"
+        assert preload_db.batch_lookup(["p0171", "P0300", "P0171", "NOTACODE"]) == batch, "Preload batch mismatch"
+
+    # A preloading instance on a new empty file can still build the database.
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        empty_path = os.path.join(tmp_dir, "empty.db")
+        open(empty_path, "wb").close()
+        with DTCDatabase(db_path=empty_path, preload=True, readonly=False) as empty_db:
+            empty_db.create_database()
+            assert empty_db.get_description("P1690", "FORD") == ford_specific, "Preload after build mismatch"
+
     print("✓ All tests passed!")
 
 
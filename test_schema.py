@@ -45,7 +45,8 @@ def test_database_schema():
     cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='dtc_definitions'")
     indexes = [row[0] for row in cursor.fetchall()]
 
-    expected_indexes = ['idx_code', 'idx_manufacturer', 'idx_generic', 'idx_locale', 'idx_type']
+    expected_indexes = ['idx_code', 'idx_manufacturer', 'idx_generic', 'idx_locale', 'idx_type',
+                        'idx_code_lookup', 'idx_type_lookup', 'idx_manufacturer_lookup']
     for idx in expected_indexes:
         if idx not in indexes:
             print(f"  ✗ FAIL: Missing index '{idx}'")
@@ -53,6 +54,33 @@ def test_database_schema():
 
     print("  ✓ PASS: All indexes present")
 
+    # Hot library queries should be answered from their index, in order
+    plan_checks = [
+        ("code lookup", 'idx_code_lookup', """
+            SELECT code, description FROM dtc_definitions
+            WHERE code = 'P0171' AND locale = 'en'
+            ORDER BY is_generic DESC, manufacturer ASC LIMIT 1
+        """),
+        ("type listing", 'idx_type_lookup', """
+            SELECT code, description FROM dtc_definitions
+            WHERE type = 'P' AND locale = 'en'
+            ORDER BY is_generic DESC, code ASC LIMIT 100
+        """),
+        ("manufacturer listing", 'idx_manufacturer_lookup', """
+            SELECT code, description FROM dtc_definitions
+            WHERE manufacturer = 'FORD' AND locale = 'en'
+            ORDER BY code ASC LIMIT 200
+        """),
+    ]
+    for label, idx, query in plan_checks:
+        cursor.execute("EXPLAIN QUERY PLAN " + query)
+        plan = ' | '.join(row[-1] for row in cursor.fetchall())
+        if idx not in plan or 'TEMP B-TREE' in plan:
+            print(f"  ✗ FAIL: {label} does not use '{idx}' without sorting: {plan}")
+            return False
+
+    print("  ✓ PASS: Lookup queries use their indexes")
+
     # Test 3: Check data integrity
     print("\nTest 3: Checking data integrity...")
 